@@ -0,0 +1,140 @@
+"""Extração em lote: downloads num pool de threads, parsing num pool de processos"""
+import argparse
+import glob
+import json
+import os
+import queue
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+import streamlit_app
+
+
+def _init_worker():
+    streamlit_app.use_headless_ui()
+
+
+def _parse_bytes(raw, encoding, max_videos):
+    # Só CPU: as thumbnails (que verificam na rede) ficam para o pool de I/O
+    html = raw.decode(encoding or 'utf-8', errors='replace')
+    return streamlit_app.extract_from_html(html, max_videos, thumbnails=False)
+
+
+def _parse_file(path, max_videos):
+    # O worker lê o arquivo sozinho: só o caminho atravessa o pickle
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return _parse_bytes(raw, 'utf-8', max_videos)
+
+
+class _Pipeline:
+    """Encadeia download (threads) -> parsing (processos) -> thumbnails (threads).
+
+    Cada etapa é disparada pelo callback da anterior, então os resultados
+    saem enquanto outras páginas ainda estão sendo baixadas e os bytes de
+    uma página são liberados assim que o parsing dela termina.
+    """
+
+    def __init__(self, io_pool, cpu_pool, max_videos):
+        self.io_pool = io_pool
+        self.cpu_pool = cpu_pool
+        self.max_videos = max_videos
+        self.done = queue.Queue()
+
+    def start_fetch(self, i, url):
+        # Bytes crus: baratos de enviar ao worker, que decodifica lá
+        self.io_pool.submit(streamlit_app.fetch_page_raw, url).add_done_callback(partial(self._on_fetched, i))
+
+    def start_file(self, i, path):
+        future = self.cpu_pool.submit(_parse_file, path, self.max_videos)
+        future.add_done_callback(partial(self._on_parsed, i))
+
+    def _on_fetched(self, i, future):
+        try:
+            raw, encoding = future.result()
+            parse_future = self.cpu_pool.submit(_parse_bytes, raw, encoding, self.max_videos)
+        except Exception as e:
+            self.done.put((i, None, e))
+            return
+        parse_future.add_done_callback(partial(self._on_parsed, i))
+
+    def _on_parsed(self, i, future):
+        try:
+            records = future.result()
+            thumbs_future = self.io_pool.submit(streamlit_app.fill_smart_thumbnails, records)
+        except Exception as e:
+            self.done.put((i, None, e))
+            return
+        thumbs_future.add_done_callback(partial(self._on_finished, i))
+
+    def _on_finished(self, i, future):
+        try:
+            self.done.put((i, future.result(), None))
+        except Exception as e:
+            self.done.put((i, None, e))
+
+    def results(self, sources, ordered):
+        """Gera {'source', 'records', 'error'} na ordem de entrada ou de conclusão"""
+        pending = {}
+        next_index = 0
+        for _ in range(len(sources)):
+            i, records, error = self.done.get()
+            result = {'source': sources[i], 'records': records or [],
+                      'error': str(error) if error else None}
+            if not ordered:
+                yield result
+                continue
+            pending[i] = result
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
+
+
+def extract_batch(urls, max_videos=20, fetch_workers=8, parse_workers=None, ordered=True):
+    """Extrai uma lista de URLs, separando rede (threads) de parsing (processos)"""
+    urls = list(urls)
+    with ThreadPoolExecutor(max_workers=fetch_workers) as io_pool, \
+            ProcessPoolExecutor(max_workers=parse_workers, initializer=_init_worker) as cpu_pool:
+        pipeline = _Pipeline(io_pool, cpu_pool, max_videos)
+        for i, url in enumerate(urls):
+            pipeline.start_fetch(i, url)
+        yield from pipeline.results(urls, ordered)
+
+
+def extract_directory(directory, max_videos=20, pattern='*.html', fetch_workers=8,
+                      parse_workers=None, ordered=True):
+    """Extrai páginas gravadas em disco usando todos os núcleos"""
+    paths = sorted(glob.glob(os.path.join(directory, pattern)))
+    with ThreadPoolExecutor(max_workers=fetch_workers) as io_pool, \
+            ProcessPoolExecutor(max_workers=parse_workers, initializer=_init_worker) as cpu_pool:
+        pipeline = _Pipeline(io_pool, cpu_pool, max_videos)
+        for i, path in enumerate(paths):
+            pipeline.start_file(i, path)
+        yield from pipeline.results(paths, ordered)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extração em lote de vídeos do Artlist")
+    parser.add_argument('inputs', nargs='+', help="URLs do Artlist ou um diretório com páginas .html gravadas")
+    parser.add_argument('--max-videos', type=int, default=20)
+    parser.add_argument('--fetch-workers', type=int, default=8)
+    parser.add_argument('--parse-workers', type=int, default=None)
+    parser.add_argument('--as-completed', action='store_true', help="Emitir resultados na ordem de conclusão")
+    args = parser.parse_args(argv)
+    streamlit_app.use_headless_ui()
+
+    ordered = not args.as_completed
+    if len(args.inputs) == 1 and os.path.isdir(args.inputs[0]):
+        results = extract_directory(args.inputs[0], args.max_videos, fetch_workers=args.fetch_workers,
+                                    parse_workers=args.parse_workers, ordered=ordered)
+    else:
+        results = extract_batch(args.inputs, args.max_videos, fetch_workers=args.fetch_workers,
+                                parse_workers=args.parse_workers, ordered=ordered)
+
+    for result in results:
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+if __name__ == "__main__":
+    main()
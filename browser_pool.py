@@ -0,0 +1,204 @@
+"""Pool de navegadores headless para páginas cuja grade é renderizada em JavaScript
+
+Os navegadores ficam abertos entre extrações (o processo do Streamlit mantém o
+módulo importado entre reruns), então cada renderização paga só a navegação,
+não a inicialização do Chrome. Imagens, fontes e mídia são bloqueadas.
+"""
+import atexit
+import threading
+import time
+
+import rate_control
+
+# Seletor que indica que a grade de clips já foi montada no DOM
+GRID_SELECTOR = 'a[href*="/clip/"]'
+
+# O '*' final também pega URLs de CDN com query string (ex.: foto.jpg?w=400)
+BLOCKED_URL_PATTERNS = [
+    f'*.{extension}*' for extension in [
+        'png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico',
+        'woff', 'woff2', 'ttf', 'otf', 'eot',
+        'mp4', 'webm', 'm3u8', 'm4s', 'mp3', 'm4a', 'wav', 'ogg',
+    ]
+]
+
+
+def chrome_factory():
+    """Cria um Chrome headless com imagens, fontes e mídia bloqueadas
+
+    Imagens são desligadas pelas preferências do Chrome; fontes, vídeo e áudio
+    são bloqueados por URL via `Network.setBlockedURLs` do DevTools.
+    """
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    for argument in ['--headless=new', '--no-sandbox', '--disable-dev-shm-usage',
+                     '--disable-gpu', '--disable-extensions', '--mute-audio',
+                     '--autoplay-policy=user-gesture-required',
+                     '--blink-settings=imagesEnabled=false']:
+        options.add_argument(argument)
+    options.add_experimental_option('prefs', {
+        'profile.managed_default_content_settings.images': 2,
+    })
+    # Não esperar todos os recursos da página: só o DOM, depois o seletor
+    options.page_load_strategy = 'eager'
+
+    driver = webdriver.Chrome(options=options)
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    return driver
+
+
+class BrowserPool:
+    """Mantém `size` navegadores prontos e os reaproveita entre renderizações
+
+    As navegações passam pelo limitador por host de `rate_control`, como as
+    demais requisições do app.
+    """
+
+    def __init__(self, size=2, driver_factory=chrome_factory, max_renders_per_driver=200,
+                 limiters=None):
+        self.size = size
+        self.limiters = limiters or rate_control.registry
+        self.driver_factory = driver_factory
+        self.max_renders_per_driver = max_renders_per_driver
+        self._idle = []
+        self._renders = {}
+        self._created = 0
+        # Protege a lista de livres e o contador; avisa quem espera por vaga
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def warm(self):
+        """Abre os navegadores que faltam para completar o pool"""
+        while True:
+            with self._cond:
+                if self._created >= self.size:
+                    return
+                self._created += 1
+            driver = self._new_driver()
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+
+    def _new_driver(self):
+        try:
+            driver = self.driver_factory()
+        except BaseException:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+        self._renders[id(driver)] = 0
+        return driver
+
+    def _checkout(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Nenhum navegador livre em {timeout}s")
+                self._cond.wait(remaining)
+        return self._new_driver()
+
+    def _discard(self, driver):
+        self._renders.pop(id(driver), None)
+        with self._cond:
+            self._created -= 1
+            # Abriu vaga para um navegador novo
+            self._cond.notify()
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _checkin(self, driver):
+        self._renders[id(driver)] = self._renders.get(id(driver), 0) + 1
+        # Reciclar de tempos em tempos evita vazamento de memória do navegador
+        if self._closed or self._renders[id(driver)] >= self.max_renders_per_driver:
+            self._discard(driver)
+            return
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify()
+
+    def render(self, url, selector=GRID_SELECTOR, timeout=15):
+        """Abre a URL num navegador do pool e retorna o HTML após o seletor aparecer"""
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        if self._closed:
+            raise RuntimeError("BrowserPool já foi fechado")
+
+        limiter = self.limiters.get(url)
+        if not limiter.acquire(timeout=timeout):
+            raise TimeoutError(f"Sem vaga para {limiter.host} em {timeout}s")
+
+        start = time.monotonic()
+        try:
+            driver = self._checkout(timeout)
+        except BaseException:
+            limiter.release()
+            raise
+
+        try:
+            driver.get(url)
+            try:
+                WebDriverWait(driver, timeout, poll_frequency=0.05).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+                )
+            except TimeoutException:
+                # A página carregou mas sem grade (ex.: busca vazia): não é
+                # congestionamento; devolvemos o DOM atual e o pipeline decide
+                pass
+            html = driver.page_source
+        except BaseException:
+            # Navegador em estado incerto (travou, caiu): substituir por um novo
+            self._discard(driver)
+            limiter.release(time.monotonic() - start, timed_out=True)
+            raise
+
+        self._checkin(driver)
+        limiter.release(time.monotonic() - start, status=200)
+        return html
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            drivers, self._idle = self._idle, []
+        for driver in drivers:
+            self._discard(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(size=2):
+    """Pool compartilhado pelo processo, criado no primeiro uso"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(size=size)
+            atexit.register(_pool.close)
+        return _pool
+
+
+def render_page(url, selector=GRID_SELECTOR, timeout=15):
+    """Atalho para renderizar uma URL com o pool compartilhado"""
+    return get_pool().render(url, selector=selector, timeout=timeout)
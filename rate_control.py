@@ -0,0 +1,191 @@
+"""Controle adaptativo de concorrência (AIMD) por host de destino"""
+import threading
+import time
+from urllib.parse import urlparse
+
+# Limites iniciais por host: (inicial, mínimo, máximo, latência saudável em segundos)
+DEFAULT_HOST_LIMITS = {
+    'artlist.io': {'initial': 2, 'min_limit': 1, 'max_limit': 8, 'latency_target': 3.0},
+    'source.unsplash.com': {'initial': 4, 'min_limit': 1, 'max_limit': 16, 'latency_target': 1.5},
+    'picsum.photos': {'initial': 4, 'min_limit': 1, 'max_limit': 16, 'latency_target': 1.5},
+}
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos"""
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    """Limita requisições simultâneas a um host, ajustando o limite por AIMD.
+
+    Cada resposta rápida e bem-sucedida aumenta o limite em 1/limite (cerca de
+    +1 por janela completa); 429, 5xx e timeouts multiplicam o limite por
+    `decrease`. Um Retry-After bloqueia novas requisições até expirar, limitado
+    a `max_retry_after` segundos para um valor exagerado não travar o host.
+    """
+
+    def __init__(self, host, initial=2, min_limit=1, max_limit=16,
+                 latency_target=2.0, decrease=0.5, max_retry_after=60.0, clock=time.monotonic):
+        self.host = host
+        self.max_retry_after = max_retry_after
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self._clock = clock
+        self._limit = float(max(min_limit, min(initial, max_limit)))
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._last_decrease = float('-inf')
+        self._cond = threading.Condition()
+        self.stats = {'ok': 0, 'slow': 0, 'throttled': 0, 'errors': 0, 'timeouts': 0}
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def acquire(self, timeout=None):
+        """Aguarda uma vaga; retorna False se `timeout` expirar antes"""
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._cond:
+            while True:
+                now = self._clock()
+                wait = None
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                elif self._in_flight < self.limit:
+                    self._in_flight += 1
+                    return True
+
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+
+    def release(self, latency=None, status=None, timed_out=False, retry_after=None):
+        """Libera a vaga e ajusta o limite conforme o resultado da requisição"""
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            now = self._clock()
+
+            if retry_after:
+                retry_after = min(retry_after, self.max_retry_after)
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+            if timed_out or status in RETRY_STATUS:
+                if timed_out:
+                    self.stats['timeouts'] += 1
+                elif status == 429:
+                    self.stats['throttled'] += 1
+                else:
+                    self.stats['errors'] += 1
+                self._back_off(now)
+            elif status is not None and status < 400:
+                if latency is not None and latency > self.latency_target:
+                    self.stats['slow'] += 1
+                else:
+                    self.stats['ok'] += 1
+                    self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+
+            self._cond.notify_all()
+
+    def _back_off(self, now):
+        # Uma rajada de falhas da mesma janela conta como um único corte
+        if now - self._last_decrease < self.latency_target:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.decrease)
+
+    def snapshot(self):
+        with self._cond:
+            now = self._clock()
+            return {
+                'host': self.host,
+                'limit': self.limit,
+                'in_flight': self._in_flight,
+                'blocked_for': round(max(0.0, self._blocked_until - now), 2),
+                **self.stats,
+            }
+
+
+class LimiterRegistry:
+    """Mantém um AdaptiveLimiter compartilhado para cada host"""
+
+    def __init__(self, host_limits=None, default_limits=None):
+        self.host_limits = dict(DEFAULT_HOST_LIMITS if host_limits is None else host_limits)
+        self.default_limits = default_limits or {'initial': 2, 'min_limit': 1, 'max_limit': 8}
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        host = (urlparse(url).hostname or url).lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                config = self.host_limits.get(host, self.default_limits)
+                limiter = AdaptiveLimiter(host, **config)
+                self._limiters[host] = limiter
+            return limiter
+
+    def request(self, method, url, session=None, acquire_timeout=None, **kwargs):
+        """Executa uma requisição HTTP respeitando o limite do host"""
+        import requests
+
+        limiter = self.get(url)
+        if not limiter.acquire(timeout=acquire_timeout):
+            raise requests.Timeout(f"Sem vaga para {limiter.host} em {acquire_timeout}s")
+
+        http = session or requests
+        start = time.monotonic()
+        try:
+            response = http.request(method, url, **kwargs)
+        except requests.Timeout:
+            limiter.release(time.monotonic() - start, timed_out=True)
+            raise
+        except requests.RequestException:
+            limiter.release(time.monotonic() - start, status=503)
+            raise
+        except BaseException:
+            limiter.release()
+            raise
+
+        limiter.release(
+            time.monotonic() - start,
+            status=response.status_code,
+            retry_after=parse_retry_after(response.headers.get('Retry-After')),
+        )
+        return response
+
+    def snapshot(self):
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return [limiter.snapshot() for limiter in limiters]
+
+
+registry = LimiterRegistry()
+
+
+def limited_request(method, url, **kwargs):
+    """Atalho para `registry.request` usando o registro global"""
+    return registry.request(method, url, **kwargs)
+
+
+def limits_snapshot():
+    """Limites atuais de todos os hosts já contatados"""
+    return registry.snapshot()
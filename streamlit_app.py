@@ -1,31 +1,119 @@
-import streamlit as st
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import importlib.util
+import sys
+from bisect import bisect_right
 import time
 import re
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
 import json
-import os
 
-# Configuração da página
-st.set_page_config(
-    page_title="Extrator de Vídeos Artlist",
-    page_icon="🎬",
-    layout="wide"
-)
+from rate_control import limited_request, limits_snapshot
 
-st.title("🎬 Extrator de Vídeos do Artlist")
-st.markdown("Extraia dados de vídeos do Artlist.io - Versão Cloud")
+def _lazy_module(name):
+    """Importa o módulo só no primeiro acesso a um atributo"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
 
-def generate_smart_thumbnail(title, video_url, video_id):
-    """Gera thumbnail inteligente baseado no contexto"""
+class _SilentUI:
+    """Substitui o streamlit fora do app: toda chamada de UI vira no-op"""
+    def __getattr__(self, name):
+        return self
+    
+    def __call__(self, *args, **kwargs):
+        return self
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+try:
+    st = _lazy_module('streamlit')
+except ModuleNotFoundError:
+    # CLI e workers rodam sem o streamlit instalado
+    st = _SilentUI()
+
+def use_headless_ui():
+    """Para CLI e workers: descarta as mensagens de UI sem importar o streamlit"""
+    global st
+    st = _SilentUI()
+
+ARTLIST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Referer': 'https://artlist.io/',
+}
+
+# Tabelas constantes e padrões compilados uma única vez, na importação
+STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'new'})
+
+THUMBNAIL_CATEGORIES = {
+    'nature': ['safari', 'africa', 'wildlife', 'animal', 'forest', 'tree', 'mountain', 'ocean'],
+    'city': ['urban', 'city', 'building', 'street', 'downtown', 'skyline'],
+    'people': ['person', 'people', 'man', 'woman', 'child', 'family'],
+    'business': ['office', 'meeting', 'work', 'business', 'corporate'],
+    'abstract': ['abstract', 'pattern', 'texture', 'background']
+}
+
+_CATEGORY_NAMES = list(THUMBNAIL_CATEGORIES)
+_CATEGORY_RANK = {}
+for _rank, _keywords in enumerate(THUMBNAIL_CATEGORIES.values()):
+    for _keyword in _keywords:
+        _CATEGORY_RANK.setdefault(_keyword, _rank)
+
+# Lookahead acha palavras sobrepostas; em cada posição a de maior prioridade vem primeiro
+_CATEGORY_RE = re.compile('(?=(' + '|'.join(re.escape(k) for k in _CATEGORY_RANK) + '))')
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+
+JS_DATA_PATTERNS = [re.compile(pattern, re.DOTALL) for pattern in [
+    r'window\.__INITIAL_STATE__\s*=\s*({.+?});',
+    r'window\.__NEXT_DATA__\s*=\s*({.+?});',
+    r'"videos"\s*:\s*(\[.+?\])',
+    r'"clips"\s*:\s*(\[.+?\])',
+    r'initialProps"\s*:\s*({.+?})'
+]]
+
+CLIP_URL_PATTERNS = [re.compile(pattern) for pattern in [
+    r'href="([^"]*(?:/clip/|/stock-footage/clip/)[^"]*)"',  # Links diretos
+    r'["\']([^"\']*(?:/clip/|/stock-footage/clip/)[^"\']*)["\']',  # JavaScript
+    r'to="([^"]*(?:/clip/|/stock-footage/clip/)[^"]*)"',  # Router links
+    r'pathname["\s]*:["\s]*["\']([^"\']*(?:/clip/|/stock-footage/clip/)[^"\']*)["\']'  # Pathname configs
+]]
+
+VIDEO_ID_PATTERNS = [re.compile(pattern) for pattern in [
+    r'data-(?:video-)?id["\s]*=["\']\s*(\d{6,8})["\']',  # data-id
+    r'"id"\s*:\s*["\']?(\d{6,8})["\']?',  # JSON id
+    r'videoId["\s]*:["\s]*["\']?(\d{6,8})["\']?',  # videoId
+    r'clipId["\s]*:["\s]*["\']?(\d{6,8})["\']?',  # clipId
+    r'/(\d{6,8})(?:["\s/]|$)'  # Números de 6-8 dígitos em URLs
+]]
+
+_FALLBACK_ID_RE = re.compile(r'\b(\d{6,8})\b')
+
+def generate_smart_thumbnail(title, video_url, video_id, classification=None):
+    """Gera thumbnail inteligente baseado no contexto
+    
+    `classification` é o par (categoria, palavras_chave) já calculado por
+    `classify_titles`; sem ele, o título é classificado aqui.
+    """
     if not title:
         return "https://via.placeholder.com/400x225/2196F3/ffffff?text=🎬+Artlist+Video"
     
     try:
-        keywords = extract_keywords_from_title(title)
-        category = get_thumbnail_category(title)
+        if classification:
+            category, keywords = classification
+        else:
+            keywords = extract_keywords_from_title(title)
+            category = get_thumbnail_category(title)
         
         thumbnail_options = {
             'nature': f"https://source.unsplash.com/400x225/?{keywords},safari,wildlife",
@@ -38,7 +126,8 @@ def generate_smart_thumbnail(title, video_url, video_id):
         url = thumbnail_options.get(category, f"https://source.unsplash.com/400x225/?{keywords}")
         
         try:
-            response = requests.head(url, timeout=3)
+            # Verificação opcional: host bloqueado ou cheio cai direto no fallback
+            response = limited_request('HEAD', url, timeout=3, allow_redirects=False, acquire_timeout=3)
             if response.status_code == 200:
                 return url
         except:
@@ -55,28 +144,68 @@ def extract_keywords_from_title(title):
     if not title:
         return "video"
     
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'new'}
-    clean_title = re.sub(r'[^\w\s]', ' ', title.lower())
-    words = [word.strip() for word in clean_title.split() if word.strip() and word not in stop_words]
+    clean_title = _NON_WORD_RE.sub(' ', title.lower())
+    words = [word.strip() for word in clean_title.split() if word.strip() and word not in STOP_WORDS]
     return ','.join(words[:3]) if words else 'nature'
 
 def get_thumbnail_category(title):
     """Determina categoria da thumbnail"""
-    title_lower = title.lower()
+    ranks = [_CATEGORY_RANK[keyword] for keyword in _CATEGORY_RE.findall(title.lower())]
+    return _CATEGORY_NAMES[min(ranks)] if ranks else 'nature'
+
+def classify_titles(titles):
+    """Categoria e palavras-chave de um lote de títulos numa só chamada.
     
-    categories = {
-        'nature': ['safari', 'africa', 'wildlife', 'animal', 'forest', 'tree', 'mountain', 'ocean'],
-        'city': ['urban', 'city', 'building', 'street', 'downtown', 'skyline'],
-        'people': ['person', 'people', 'man', 'woman', 'child', 'family'],
-        'business': ['office', 'meeting', 'work', 'business', 'corporate'],
-        'abstract': ['abstract', 'pattern', 'texture', 'background']
-    }
+    Os títulos são concatenados e cada padrão roda uma vez sobre o lote
+    inteiro; o resultado é igual ao de `get_thumbnail_category` e
+    `extract_keywords_from_title` título a título. Retorna uma lista de
+    (categoria, palavras_chave) na ordem dos títulos; títulos que não são
+    texto (ex.: dict vindo do JSON da página) recebem None e são tratados
+    por `generate_smart_thumbnail` como antes.
+    """
+    lowered = [title.replace('\n', ' ').lower() if isinstance(title, str) else ''
+               for title in titles]
+    text = '\n'.join(lowered)
     
-    for category, keywords in categories.items():
-        if any(keyword in title_lower for keyword in keywords):
-            return category
+    # Posição inicial de cada título no texto concatenado
+    starts = []
+    position = 0
+    for title in lowered:
+        starts.append(position)
+        position += len(title) + 1
     
-    return 'nature'
+    best_rank = [None] * len(lowered)
+    for match in _CATEGORY_RE.finditer(text):
+        i = bisect_right(starts, match.start()) - 1
+        rank = _CATEGORY_RANK[match.group(1)]
+        if best_rank[i] is None or rank < best_rank[i]:
+            best_rank[i] = rank
+    
+    # A substituição preserva o tamanho, então as linhas continuam alinhadas
+    lines = _NON_WORD_RE.sub(' ', text).split('\n') if lowered else []
+    
+    results = []
+    for title, line, rank in zip(titles, lines, best_rank):
+        category = _CATEGORY_NAMES[rank] if rank is not None else 'nature'
+        if title and not isinstance(title, str):
+            results.append(None)
+            continue
+        if not title:
+            results.append((category, 'video'))
+            continue
+        words = [word for word in line.split() if word not in STOP_WORDS]
+        results.append((category, ','.join(words[:3]) if words else 'nature'))
+    return results
+
+def fill_smart_thumbnails(records):
+    """Gera as thumbnails que faltam, classificando todos os títulos de uma vez"""
+    missing = [record for record in records if not record.get('Thumbnail URL')]
+    classifications = classify_titles([record['Title'] for record in missing])
+    for record, classification in zip(missing, classifications):
+        record['Thumbnail URL'] = generate_smart_thumbnail(
+            record['Title'], record['Video URL'], record['ID'], classification
+        )
+    return records
 
 def extract_video_from_element(element, index):
     """Extrai dados de um elemento HTML"""
@@ -237,44 +366,65 @@ def extract_video_from_element(element, index):
         st.error(f"Erro ao extrair elemento {index}: {e}")
         return None
 
-def extract_with_requests(url, max_videos=20):
+def _request_page(url):
+    response = limited_request('GET', url, headers=ARTLIST_HEADERS, timeout=30, acquire_timeout=30)
+    response.raise_for_status()
+    return response
+
+def fetch_page(url):
+    """Baixa a página do Artlist e retorna o HTML"""
+    return _request_page(url).text
+
+def fetch_page_raw(url):
+    """Baixa a página do Artlist e retorna (bytes, encoding), sem decodificar"""
+    response = _request_page(url)
+    return response.content, response.encoding
+
+def extract_with_requests(url, max_videos=20, render_js=False):
     """Extração usando requests + BeautifulSoup - VERSÃO SIMPLIFICADA E GARANTIDA"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Referer': 'https://artlist.io/',
-    }
+    try:
+        st.info("🔍 Fazendo requisição para o Artlist...")
+        html = fetch_page(url)
+    except Exception as e:
+        st.error(f"Erro na extração: {e}")
+        return []
     
-    df_data = []
+    return extract_from_html(html, max_videos, render_url=url if render_js else None)
+
+def extract_from_html(html, max_videos=20, render_url=None, thumbnails=True):
+    """Extrai os vídeos de um HTML já baixado.
+    
+    Se `render_url` for informada e a grade não estiver no HTML estático, a
+    página é renderizada pelo pool de navegadores headless e o DOM resultante
+    passa por esta mesma extração. Com `thumbnails=False` os vídeos sem
+    thumbnail na página voltam com 'Thumbnail URL' vazio, para o chamador
+    completar com `fill_smart_thumbnails` (que faz as verificações na rede).
+    """
+    records = _extract_records(html, max_videos, render_url)
+    if thumbnails:
+        fill_smart_thumbnails(records)
+    return records
+
+def _extract_records(html, max_videos, render_url=None):
+    """Parsing do HTML em registros de vídeo, sem gerar thumbnails"""
+    from bs4 import BeautifulSoup
     
     try:
-        st.info("🔍 Fazendo requisição para o Artlist...")
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        st.info(f"📄 Página carregada. Tamanho: {len(response.text)} caracteres")
+        soup = BeautifulSoup(html, 'html.parser')
+        st.info(f"📄 Página carregada. Tamanho: {len(html)} caracteres")
         
         with st.expander("🔧 Debug - HTML (primeiros 2000 chars)"):
-            st.text(response.text[:2000])
+            st.text(html[:2000])
         
         # VERIFICAR se a página carrega vídeos via JavaScript
-        if 'window.__INITIAL_STATE__' in response.text or 'window.__NEXT_DATA__' in response.text or '"videos"' in response.text:
+        if 'window.__INITIAL_STATE__' in html or 'window.__NEXT_DATA__' in html or '"videos"' in html:
             st.info("🔄 Página usa carregamento JavaScript - tentando extrair dados...")
             
             # Buscar dados JSON embedados na página
-            js_data_patterns = [
-                r'window\.__INITIAL_STATE__\s*=\s*({.+?});',
-                r'window\.__NEXT_DATA__\s*=\s*({.+?});',
-                r'"videos"\s*:\s*(\[.+?\])',
-                r'"clips"\s*:\s*(\[.+?\])',
-                r'initialProps"\s*:\s*({.+?})'
-            ]
-            
             extracted_data = []
-            for pattern in js_data_patterns:
+            for pattern in JS_DATA_PATTERNS:
                 try:
-                    matches = re.findall(pattern, response.text, re.DOTALL)
+                    matches = pattern.findall(html)
                     for match in matches:
                         try:
                             data = json.loads(match)
@@ -295,30 +445,15 @@ def extract_with_requests(url, max_videos=20):
         # CONTINUAR com método original se não encontrou JSON
         
         # BUSCAR URLs de clips na página de grade - MÚLTIPLOS PADRÕES
-        clip_urls_patterns = [
-            r'href="([^"]*(?:/clip/|/stock-footage/clip/)[^"]*)"',  # Links diretos
-            r'["\']([^"\']*(?:/clip/|/stock-footage/clip/)[^"\']*)["\']',  # JavaScript
-            r'to="([^"]*(?:/clip/|/stock-footage/clip/)[^"]*)"',  # Router links
-            r'pathname["\s]*:["\s]*["\']([^"\']*(?:/clip/|/stock-footage/clip/)[^"\']*)["\']'  # Pathname configs
-        ]
-        
         clip_urls_in_html = []
-        for pattern in clip_urls_patterns:
-            urls = re.findall(pattern, response.text)
+        for pattern in CLIP_URL_PATTERNS:
+            urls = pattern.findall(html)
             clip_urls_in_html.extend(urls)
         
         # BUSCAR por IDs de vídeo em diferentes formatos
-        video_ids_patterns = [
-            r'data-(?:video-)?id["\s]*=["\']\s*(\d{6,8})["\']',  # data-id
-            r'"id"\s*:\s*["\']?(\d{6,8})["\']?',  # JSON id
-            r'videoId["\s]*:["\s]*["\']?(\d{6,8})["\']?',  # videoId
-            r'clipId["\s]*:["\s]*["\']?(\d{6,8})["\']?',  # clipId
-            r'/(\d{6,8})(?:["\s/]|$)'  # Números de 6-8 dígitos em URLs
-        ]
-        
         video_ids_in_html = []
-        for pattern in video_ids_patterns:
-            ids = re.findall(pattern, response.text)
+        for pattern in VIDEO_ID_PATTERNS:
+            ids = pattern.findall(html)
             video_ids_in_html.extend(ids)
         
         # Remover duplicatas e limpar
@@ -367,6 +502,19 @@ def extract_with_requests(url, max_videos=20):
             for i, img in enumerate(img_data[:3]):
                 st.write(f"   {i+1}. Alt: '{img['alt'][:30]}...', Src: {img['src'][:50]}...")
         
+        # Método 3: grade montada via JavaScript - renderizar com navegador headless.
+        # Vem antes do Método 2: números de 6-8 dígitos em caminhos de chunks/build
+        # não indicam que a grade está no HTML estático.
+        if render_url and not clip_urls_in_html:
+            st.info("🌐 Grade não encontrada no HTML - renderizando com navegador headless...")
+            try:
+                from browser_pool import render_page
+                rendered_html = render_page(render_url)
+            except Exception as e:
+                st.warning(f"⚠️ Renderização falhou ({e}) - seguindo com o fallback")
+            else:
+                return _extract_records(rendered_html, max_videos)
+        
         # PROCESSAR VÍDEOS DA GRADE - PRIORIDADE POR MÉTODO
         processed_videos = []
         
@@ -375,7 +523,7 @@ def extract_with_requests(url, max_videos=20):
             st.info("🎯 Processando vídeos através das URLs...")
             
             for i, clip_url in enumerate(clip_urls_in_html[:max_videos]):
-                video_data = process_video_from_url(clip_url, i, response.text)
+                video_data = process_video_from_url(clip_url, i, html)
                 if video_data:
                     processed_videos.append(video_data)
         
@@ -404,7 +552,7 @@ def extract_with_requests(url, max_videos=20):
                     'Title': title,
                     'Description': f"Video from Artlist grid - ID: {video_id}",
                     'Video URL': constructed_url,
-                    'Thumbnail URL': thumbnail if thumbnail else generate_smart_thumbnail(title, constructed_url, video_id),
+                    'Thumbnail URL': thumbnail,
                     'Language': 'en'
                 }
                 
@@ -416,7 +564,7 @@ def extract_with_requests(url, max_videos=20):
             st.warning("⚠️ Usando método de fallback - busca agressiva...")
             
             # Buscar por qualquer número que possa ser ID de vídeo
-            all_numbers = re.findall(r'\b(\d{6,8})\b', response.text)
+            all_numbers = _FALLBACK_ID_RE.findall(html)
             potential_ids = list(set(all_numbers))[:max_videos]
             
             st.info(f"🔢 Números encontrados que podem ser IDs: {len(potential_ids)}")
@@ -429,7 +577,7 @@ def extract_with_requests(url, max_videos=20):
                     
                     # Tentar encontrar contexto para este ID
                     context_pattern = rf'.{{0,100}}{re.escape(potential_id)}.{{0,100}}'
-                    context_matches = re.findall(context_pattern, response.text)
+                    context_matches = re.findall(context_pattern, html)
                     
                     if context_matches:
                         # Tentar extrair título do contexto
@@ -445,7 +593,7 @@ def extract_with_requests(url, max_videos=20):
                         'Title': title,
                         'Description': f"Video discovered via fallback method",
                         'Video URL': video_url,
-                        'Thumbnail URL': generate_smart_thumbnail(title, video_url, potential_id),
+                        'Thumbnail URL': '',
                         'Language': 'en'
                     }
                     
@@ -511,7 +659,7 @@ def process_video_from_url(clip_url, index, html_content):
             'Title': title,
             'Description': f"Video from Artlist grid",
             'Video URL': full_url,
-            'Thumbnail URL': generate_smart_thumbnail(title, full_url, video_id),
+            'Thumbnail URL': '',
             'Language': 'en'
         }
         
@@ -629,10 +777,6 @@ def extract_video_from_json(video_obj, index):
                         thumbnail_url = thumb
                     break
         
-        # Se não encontrou thumbnail, gerar uma
-        if not thumbnail_url:
-            thumbnail_url = generate_smart_thumbnail(title, video_url, video_id)
-        
         # Buscar descrição
         description = (video_obj.get('description') or 
                       video_obj.get('summary') or
@@ -654,7 +798,31 @@ def extract_video_from_json(video_obj, index):
         st.warning(f"Erro ao extrair vídeo do JSON: {e}")
         return None
 
+def setup_page():
+    """Configura a página e a barra lateral (apenas na execução pelo Streamlit)"""
+    st.set_page_config(
+        page_title="Extrator de Vídeos Artlist",
+        page_icon="🎬",
+        layout="wide"
+    )
+    
+    st.title("🎬 Extrator de Vídeos do Artlist")
+    st.markdown("Extraia dados de vídeos do Artlist.io - Versão Cloud")
+    
+    with st.sidebar:
+        st.header("ℹ️ Como usar")
+        st.markdown("""
+        1. Cole a URL do Artlist
+        2. Defina quantos vídeos extrair
+        3. Clique em "Extrair Vídeos"
+        4. Baixe os dados em CSV/JSON
+        """)
+
 def main():
+    import pandas as pd
+    
+    setup_page()
+    
     st.markdown("### 🔧 Configurações")
     
     col1, col2 = st.columns([2, 1])
@@ -675,6 +843,12 @@ def main():
             help="Máximo de vídeos"
         )
     
+    render_js = st.checkbox(
+        "Renderizar JavaScript (navegador headless)",
+        value=False,
+        help="Usa um Chrome headless quando a grade não vem no HTML estático"
+    )
+    
     if st.button("🚀 Extrair Vídeos", type="primary"):
         if not url_input:
             st.error("⚠️ Insira uma URL válida do Artlist")
@@ -687,7 +861,7 @@ def main():
         st.info(f"🌐 Processando URL: {url_input}")
         
         with st.spinner("Extraindo dados..."):
-            df_data = extract_with_requests(url_input, max_videos)
+            df_data = extract_with_requests(url_input, max_videos, render_js=render_js)
         
         if df_data:
             st.success(f"✅ {len(df_data)} vídeos extraídos!")
@@ -740,15 +914,9 @@ def main():
         
         else:
             st.warning("❌ Nenhum vídeo encontrado")
-
-with st.sidebar:
-    st.header("ℹ️ Como usar")
-    st.markdown("""
-    1. Cole a URL do Artlist
-    2. Defina quantos vídeos extrair
-    3. Clique em "Extrair Vídeos"
-    4. Baixe os dados em CSV/JSON
-    """)
+        
+        with st.expander("📊 Limites de concorrência por host"):
+            st.dataframe(pd.DataFrame(limits_snapshot()), use_container_width=True)
 
 if __name__ == "__main__":
     main()
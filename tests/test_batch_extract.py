@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('bs4')
+pytest.importorskip('requests')
+
+import batch_extract
+import rate_control
+import streamlit_app
+
+CLIP_SLUGS = ['sunset-over-ocean-waves', 'busy-city-street-night', 'woman-walking-forest-path']
+
+
+def recorded_page(page, links=3):
+    anchors = '\n'.join(
+        f'<a href="/stock-footage/clip/{CLIP_SLUGS[n % len(CLIP_SLUGS)]}/{page * 10000 + n + 1000000}">clip</a>'
+        for n in range(links)
+    )
+    return f'<html><body><div class="grid">{anchors}</div></body></html>'
+
+
+@pytest.fixture
+def head_checks(monkeypatch):
+    """Substitui as verificações HEAD das thumbnails e registra a thread que as fez"""
+    calls = []
+
+    class Response:
+        status_code = 200
+
+    def fake_request(method, url, **kwargs):
+        if method != 'HEAD':
+            return rate_control.limited_request(method, url, **kwargs)
+        calls.append((os.getpid(), url))
+        return Response()
+
+    monkeypatch.setattr(streamlit_app, 'limited_request', fake_request)
+    return calls
+
+
+@pytest.fixture
+def pages_dir(tmp_path):
+    for page in range(6):
+        (tmp_path / f'page_{page:02d}.html').write_text(recorded_page(page), encoding='utf-8')
+    return tmp_path
+
+
+def test_directory_ordered_results(pages_dir, head_checks):
+    results = list(batch_extract.extract_directory(str(pages_dir), max_videos=5, parse_workers=2))
+
+    assert [os.path.basename(r['source']) for r in results] == [f'page_{p:02d}.html' for p in range(6)]
+    for page, result in enumerate(results):
+        assert result['error'] is None
+        assert sorted(r['ID'] for r in result['records']) == [str(page * 10000 + n + 1000000) for n in range(3)]
+        assert all(r['Thumbnail URL'].startswith('https://source.unsplash.com/') for r in result['records'])
+
+    # As thumbnails são verificadas no processo principal (pool de I/O), não nos workers
+    assert len(head_checks) == 18
+    assert {pid for pid, _ in head_checks} == {os.getpid()}
+
+
+def test_directory_as_completed_results(pages_dir, head_checks):
+    results = list(batch_extract.extract_directory(str(pages_dir), max_videos=5, parse_workers=2,
+                                                   ordered=False))
+
+    assert sorted(os.path.basename(r['source']) for r in results) == [f'page_{p:02d}.html' for p in range(6)]
+    assert all(len(r['records']) == 3 and r['error'] is None for r in results)
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/slow'):
+            time.sleep(2)
+        if self.path.startswith('/missing'):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = recorded_page(int(self.path.rsplit('/', 1)[-1])).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def page_server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_batch_streams_results_while_fetches_run(page_server, head_checks):
+    urls = [f'{page_server}/slow/0'] + [f'{page_server}/fast/{n}' for n in range(1, 4)]
+
+    start = time.monotonic()
+    results = batch_extract.extract_batch(urls, max_videos=5, fetch_workers=4, parse_workers=1,
+                                          ordered=False)
+    first = next(results)
+    first_latency = time.monotonic() - start
+    rest = list(results)
+
+    assert first['source'] != urls[0]
+    assert first_latency < 1.5
+    assert sorted(r['source'] for r in [first] + rest) == sorted(urls)
+    assert all(r['error'] is None and len(r['records']) == 3 for r in [first] + rest)
+
+
+def test_batch_ordered_reports_fetch_errors(page_server, head_checks):
+    urls = [f'{page_server}/fast/1', f'{page_server}/missing/2', f'{page_server}/fast/3']
+    results = list(batch_extract.extract_batch(urls, max_videos=5, parse_workers=1))
+
+    assert [r['source'] for r in results] == urls
+    assert results[1]['records'] == [] and '404' in results[1]['error']
+    assert results[0]['error'] is None and results[2]['error'] is None
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 4, reason="precisa de ao menos 4 núcleos")
+def test_parsing_throughput_scales_with_cores(tmp_path, head_checks):
+    for page in range(16):
+        (tmp_path / f'page_{page:02d}.html').write_text(recorded_page(page, links=4000), encoding='utf-8')
+
+    def elapsed(workers):
+        start = time.monotonic()
+        results = list(batch_extract.extract_directory(str(tmp_path), max_videos=2,
+                                                       parse_workers=workers))
+        assert len(results) == 16
+        return time.monotonic() - start
+
+    single = elapsed(1)
+    parallel = elapsed(4)
+    assert single / parallel > 1.5
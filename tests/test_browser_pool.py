@@ -0,0 +1,198 @@
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('bs4')
+
+import rate_control
+import streamlit_app
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+EXPECTED_IDS = ['1234567', '2345678', '3456789']
+
+
+def fixture_html(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def rendered_fixture():
+    grid = ''.join(
+        f'<a href="/stock-footage/clip/{slug}/{clip_id}">clip</a>'
+        for slug, clip_id in zip(['sunset-over-ocean-waves', 'busy-city-street-night',
+                                  'woman-walking-forest-path'], EXPECTED_IDS)
+    )
+    return fixture_html('js_grid.html').replace('<div id="grid"></div>', f'<div id="grid">{grid}</div>')
+
+
+def test_client_rendered_grid_triggers_render(monkeypatch):
+    import browser_pool
+
+    rendered = []
+
+    def fake_render(url, **kwargs):
+        rendered.append(url)
+        return rendered_fixture()
+
+    monkeypatch.setattr(browser_pool, 'render_page', fake_render)
+
+    # O HTML estático tem um "ID" de 8 dígitos no caminho do chunk, mas nenhum clip
+    records = streamlit_app.extract_from_html(fixture_html('js_grid.html'), max_videos=10,
+                                              render_url='https://artlist.io/stock-footage',
+                                              thumbnails=False)
+
+    assert rendered == ['https://artlist.io/stock-footage']
+    assert sorted(record['ID'] for record in records) == EXPECTED_IDS
+
+
+def test_static_grid_does_not_render(monkeypatch):
+    import browser_pool
+
+    monkeypatch.setattr(browser_pool, 'render_page', pytest.fail)
+    records = streamlit_app.extract_from_html(rendered_fixture(), max_videos=10,
+                                              render_url='https://artlist.io/stock-footage',
+                                              thumbnails=False)
+    assert sorted(record['ID'] for record in records) == EXPECTED_IDS
+
+
+def test_blocked_patterns_match_cdn_query_strings():
+    from fnmatch import fnmatch
+
+    from browser_pool import BLOCKED_URL_PATTERNS
+
+    for url in ['https://cdn.artlist.io/thumb.jpg?w=400', 'https://cdn.artlist.io/font.woff2?v=3',
+                'https://cdn.artlist.io/preview.mp4?token=abc']:
+        assert any(fnmatch(url, pattern) for pattern in BLOCKED_URL_PATTERNS), url
+    assert not any(fnmatch('https://artlist.io/stock-footage', p) for p in BLOCKED_URL_PATTERNS)
+
+
+class FakeDriver:
+    """Driver mínimo: a grade 'aparece' no DOM imediatamente (ou nunca)"""
+
+    def __init__(self, delay=0.0, has_grid=True):
+        self.visited = []
+        self.delay = delay
+        self.has_grid = has_grid
+        self.page_source = rendered_fixture()
+
+    def get(self, url):
+        time.sleep(self.delay)
+        self.visited.append(url)
+
+    def find_element(self, by, value):
+        if not self.has_grid:
+            from selenium.common.exceptions import NoSuchElementException
+            raise NoSuchElementException(value)
+        return object()
+
+    def quit(self):
+        pass
+
+
+def test_pool_reuses_drivers_and_goes_through_limiter():
+    pytest.importorskip('selenium')
+    from browser_pool import BrowserPool
+
+    created = []
+
+    def factory():
+        created.append(FakeDriver())
+        return created[-1]
+
+    limiters = rate_control.LimiterRegistry(host_limits={})
+    with BrowserPool(size=2, driver_factory=factory, limiters=limiters) as pool:
+        for n in range(5):
+            assert 'stock-footage/clip' in pool.render(f'https://artlist.io/search/{n}')
+
+    assert len(created) == 1
+    snapshot = limiters.snapshot()
+    assert snapshot[0]['host'] == 'artlist.io'
+    assert snapshot[0]['ok'] == 5 and snapshot[0]['in_flight'] == 0
+
+
+def test_waiters_wake_up_when_a_driver_is_recycled():
+    pytest.importorskip('selenium')
+    from browser_pool import BrowserPool
+
+    limiters = rate_control.LimiterRegistry(host_limits={}, default_limits={'initial': 4, 'max_limit': 4})
+    pool = BrowserPool(size=1, driver_factory=lambda: FakeDriver(delay=0.2),
+                       max_renders_per_driver=1, limiters=limiters)
+    errors = []
+
+    def render(n):
+        try:
+            pool.render(f'https://artlist.io/search/{n}', timeout=2)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=render, args=(n,)) for n in range(2)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert time.monotonic() - start < 1.5
+    pool.close()
+
+
+def test_missing_grid_is_not_congestion():
+    pytest.importorskip('selenium')
+    from browser_pool import BrowserPool
+
+    limiters = rate_control.LimiterRegistry(host_limits={}, default_limits={'initial': 4, 'max_limit': 8})
+    with BrowserPool(size=1, driver_factory=lambda: FakeDriver(has_grid=False), limiters=limiters) as pool:
+        html = pool.render('https://artlist.io/search/empty', timeout=0.2)
+
+    assert 'grid' in html
+    snapshot = limiters.snapshot()[0]
+    assert snapshot['timeouts'] == 0 and snapshot['errors'] == 0
+    assert snapshot['limit'] >= 4
+
+
+@pytest.fixture
+def fixture_server():
+    handler = functools.partial(QuietHandler, directory=FIXTURES)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def chrome_pool():
+    pytest.importorskip('selenium')
+    from browser_pool import BrowserPool
+
+    pool = BrowserPool(size=1)
+    try:
+        pool.warm()
+    except Exception as e:
+        pytest.skip(f"Chrome headless indisponível: {e}")
+    yield pool
+    pool.close()
+
+
+def test_real_render_of_js_fixture(fixture_server, chrome_pool):
+    html = chrome_pool.render(f'{fixture_server}/js_grid.html')
+    records = streamlit_app.extract_from_html(html, max_videos=10, thumbnails=False)
+    assert sorted(record['ID'] for record in records) == EXPECTED_IDS
+
+    # Com o navegador já aberto, cada renderização custa centenas de ms, não segundos
+    renders = 5
+    start = time.monotonic()
+    for _ in range(renders):
+        chrome_pool.render(f'{fixture_server}/js_grid.html')
+    assert (time.monotonic() - start) / renders < 0.8
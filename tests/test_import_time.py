@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamento do import a frio de streamlit_app (microssegundos, acumulado)
+IMPORT_BUDGET_US = 200_000
+
+HEAVY_MODULES = {'streamlit', 'pandas', 'bs4', 'requests', 'selenium', 'lxml'}
+
+
+def run_importtime(module):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def test_streamlit_app_cold_import_is_cheap():
+    timings = run_importtime('streamlit_app')
+
+    assert timings['streamlit_app'] < IMPORT_BUDGET_US
+    loaded_roots = {name.split('.')[0] for name in timings}
+    assert not loaded_roots & HEAVY_MODULES
+
+
+def test_cli_modules_do_not_import_heavy_dependencies():
+    for module in ('batch_extract', 'work_queue'):
+        loaded_roots = {name.split('.')[0] for name in run_importtime(module)}
+        assert not loaded_roots & HEAVY_MODULES, module
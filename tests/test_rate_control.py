@@ -0,0 +1,177 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from rate_control import AdaptiveLimiter, LimiterRegistry, parse_retry_after
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Servidor local que injeta latência, 429 com Retry-After e 5xx"""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            time.sleep(float(query.get('delay', ['0'])[0]))
+
+            if parsed.path == '/throttle':
+                self.send_response(429)
+                self.send_header('Retry-After', query.get('retry', ['1'])[0])
+            elif parsed.path == '/error':
+                self.send_response(503)
+            else:
+                self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    httpd.lock = threading.Lock()
+    httpd.in_flight = 0
+    httpd.max_in_flight = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_registry(**limits):
+    config = {'initial': 1, 'min_limit': 1, 'max_limit': 4, 'latency_target': 0.5}
+    config.update(limits)
+    return LimiterRegistry(host_limits={'127.0.0.1': config})
+
+
+def url_for(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_fast_responses_grow_limit_up_to_max(server):
+    registry = make_registry()
+    for _ in range(20):
+        registry.request('GET', url_for(server, '/ok'), timeout=5)
+
+    snapshot = registry.snapshot()[0]
+    assert snapshot['host'] == '127.0.0.1'
+    assert snapshot['limit'] == 4
+    assert snapshot['ok'] == 20
+    assert snapshot['in_flight'] == 0
+
+
+def test_slow_responses_do_not_grow_limit(server):
+    registry = make_registry(latency_target=0.05)
+    for _ in range(5):
+        registry.request('GET', url_for(server, '/ok?delay=0.1'), timeout=5)
+
+    snapshot = registry.snapshot()[0]
+    assert snapshot['limit'] == 1
+    assert snapshot['slow'] == 5
+
+
+def test_server_errors_cut_limit_once_per_window(server):
+    registry = make_registry(initial=8, max_limit=8, latency_target=5.0)
+    for _ in range(3):
+        registry.request('GET', url_for(server, '/error'), timeout=5)
+
+    snapshot = registry.snapshot()[0]
+    assert snapshot['limit'] == 4
+    assert snapshot['errors'] == 3
+
+
+def test_timeout_counts_as_congestion(server):
+    registry = make_registry(initial=4)
+    with pytest.raises(requests.Timeout):
+        registry.request('GET', url_for(server, '/ok?delay=1'), timeout=0.1)
+
+    snapshot = registry.snapshot()[0]
+    assert snapshot['timeouts'] == 1
+    assert snapshot['limit'] == 2
+
+
+def test_retry_after_blocks_host(server):
+    registry = make_registry(initial=4)
+    response = registry.request('GET', url_for(server, '/throttle?retry=1'), timeout=5)
+    assert response.status_code == 429
+
+    snapshot = registry.snapshot()[0]
+    assert snapshot['throttled'] == 1
+    assert snapshot['limit'] == 2
+    assert snapshot['blocked_for'] > 0.5
+
+    start = time.monotonic()
+    registry.request('GET', url_for(server, '/ok'), timeout=5)
+    assert time.monotonic() - start >= 0.8
+
+
+def test_in_flight_never_exceeds_limit(server):
+    registry = make_registry(initial=2, max_limit=2)
+    threads = [
+        threading.Thread(target=registry.request, args=('GET', url_for(server, '/ok?delay=0.1')),
+                         kwargs={'timeout': 5})
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert server.max_in_flight == 2
+
+
+def test_acquire_timeout_when_no_slot():
+    limiter = AdaptiveLimiter('example.com', initial=1)
+    assert limiter.acquire(timeout=0.1)
+    assert not limiter.acquire(timeout=0.1)
+    limiter.release()
+    assert limiter.acquire(timeout=0.1)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('not a date') is None
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+
+def test_retry_after_is_clamped():
+    limiter = AdaptiveLimiter('example.com', initial=2, max_retry_after=5)
+    assert limiter.acquire()
+    limiter.release(0.01, status=429, retry_after=3600)
+
+    assert 4 < limiter.snapshot()['blocked_for'] <= 5
+
+
+def test_long_retry_after_does_not_hang_thumbnail(monkeypatch):
+    import rate_control
+    import streamlit_app
+
+    registry = LimiterRegistry()
+    monkeypatch.setattr(rate_control, 'registry', registry)
+
+    url = 'https://source.unsplash.com/400x225/?ocean,safari,wildlife'
+    limiter = registry.get(url)
+    assert limiter.acquire()
+    limiter.release(0.01, status=429, retry_after=3600)
+
+    start = time.monotonic()
+    thumbnail = streamlit_app.generate_smart_thumbnail('ocean', 'https://artlist.io/clip/1', '1')
+
+    assert time.monotonic() - start < 5
+    assert thumbnail.startswith('https://picsum.photos/')
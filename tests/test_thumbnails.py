@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+import streamlit_app
+from streamlit_app import (THUMBNAIL_CATEGORIES, classify_titles, extract_keywords_from_title,
+                           fill_smart_thumbnails, get_thumbnail_category)
+
+
+def test_classify_titles_matches_per_title_functions():
+    random.seed(7)
+    vocabulary = sum(THUMBNAIL_CATEGORIES.values(), []) + ['the', 'Big', 'fun', 'İstanbul', 'x']
+    titles = ['', None, 'Line\nbreak city'] + [
+        random.choice(['', ' ', '-', '!']).join(
+            random.choice(vocabulary) for _ in range(random.randint(1, 5))
+        )
+        for _ in range(2000)
+    ]
+
+    expected = [
+        (get_thumbnail_category(title) if title else 'nature', extract_keywords_from_title(title))
+        for title in titles
+    ]
+    assert classify_titles(titles) == expected
+    assert classify_titles([]) == []
+
+
+def test_fill_smart_thumbnails_only_fills_missing(monkeypatch):
+    checked = []
+
+    class Response:
+        status_code = 404
+
+    def fake_request(method, url, **kwargs):
+        checked.append((method, url, kwargs.get('allow_redirects')))
+        return Response()
+
+    monkeypatch.setattr(streamlit_app, 'limited_request', fake_request)
+    records = [
+        {'ID': '1', 'Title': 'Busy office meeting', 'Video URL': 'u1', 'Thumbnail URL': ''},
+        {'ID': '2', 'Title': 'Ocean', 'Video URL': 'u2', 'Thumbnail URL': 'https://artlist.io/t.jpg'},
+    ]
+
+    fill_smart_thumbnails(records)
+
+    assert checked == [('HEAD', 'https://source.unsplash.com/400x225/?business,office', False)]
+    assert records[0]['Thumbnail URL'].startswith('https://picsum.photos/')
+    assert records[1]['Thumbnail URL'] == 'https://artlist.io/t.jpg'
+
+
+def test_non_string_titles_fall_back_instead_of_crashing(monkeypatch):
+    monkeypatch.setattr(streamlit_app, 'limited_request', pytest.fail)
+    assert classify_titles([{'en': 'Ocean'}, 42, 'Ocean']) == [None, None, ('nature', 'ocean')]
+
+    html = ('<script>window.__INITIAL_STATE__ = {"videos":[{"id":1234567,"title":{"en":"Ocean"},'
+            '"url":"/stock-footage/clip/ocean/1234567"}]};</script>')
+    records = streamlit_app.extract_from_html(html, max_videos=5)
+
+    assert [record['ID'] for record in records] == ['1234567']
+    assert records[0]['Thumbnail URL'].startswith('https://via.placeholder.com/')
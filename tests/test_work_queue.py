@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+from work_queue import WorkQueue, run_node
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return WorkQueue(str(tmp_path / 'queue.db'), visibility_timeout=10, max_attempts=2, clock=clock)
+
+
+def test_enqueue_ignores_known_urls(queue):
+    assert queue.enqueue(['a', 'b']) == 2
+    assert queue.enqueue(['a', 'c']) == 1
+
+    leased = queue.lease('n1', batch_size=10)
+    queue.complete('a', 'n1', [])
+    assert queue.enqueue(['a']) == 0
+    assert sorted(leased) == ['a', 'b', 'c']
+
+
+def test_lease_is_exclusive_until_it_expires(queue, clock):
+    queue.enqueue(['a', 'b'])
+    assert queue.lease('n1', batch_size=1) == ['a']
+    assert queue.lease('n2', batch_size=5) == ['b']
+    assert queue.lease('n3', batch_size=5) == []
+
+    clock.now += 11
+    assert sorted(queue.lease('n3', batch_size=5)) == ['a', 'b']
+
+
+def test_extend_keeps_lease_and_fails_after_takeover(queue, clock):
+    queue.enqueue(['a'])
+    queue.lease('n1')
+
+    clock.now += 8
+    assert queue.extend('a', 'n1')
+    clock.now += 8
+    assert queue.lease('n2') == []
+
+    clock.now += 11
+    assert queue.lease('n2') == ['a']
+    assert not queue.extend('a', 'n1')
+
+
+def test_completion_from_lost_lease_is_discarded(queue, clock):
+    queue.enqueue(['a'])
+    queue.lease('n1')
+    clock.now += 11
+    queue.lease('n2')
+
+    assert queue.complete('a', 'n1', [{'ID': '1'}]) is None
+    assert queue.complete('a', 'n2', [{'ID': '1'}]) == 1
+    assert queue.stats()['videos'] == 1
+
+
+def test_failures_retry_until_max_attempts(queue, clock):
+    queue.enqueue(['a'])
+    queue.lease('n1')
+    queue.fail('a', 'n1', 'boom')
+    assert queue.stats()['pending'] == 1
+
+    queue.lease('n1')
+    queue.fail('a', 'n1', 'boom again')
+    stats = queue.stats()
+    assert stats['failed'] == 1 and stats['pending'] == 0
+    assert queue.lease('n1') == []
+
+
+def test_expired_lease_counts_as_attempt(queue, clock):
+    queue.enqueue(['a'])
+    queue.lease('n1')
+    clock.now += 11
+    queue.lease('n2')
+    clock.now += 11
+
+    assert queue.lease('n3') == []
+    assert queue.stats()['failed'] == 1
+
+
+def test_video_ids_are_deduplicated(queue):
+    queue.enqueue(['a', 'b'])
+    queue.lease('n1', batch_size=2)
+
+    assert queue.complete('a', 'n1', [{'ID': '1'}, {'ID': '2'}]) == 2
+    assert queue.complete('b', 'n1', [{'ID': 2}, {'ID': '3'}]) == 1
+    assert queue.known_videos(['1', 3, '9']) == {'1', '3'}
+    assert sorted(r['ID'] for r in queue.results()) == ['1', '2', '3']
+
+
+def test_nodes_never_fetch_the_same_url_twice(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.db'), visibility_timeout=1)
+    urls = [f'https://artlist.io/search/{n}' for n in range(20)]
+    queue.enqueue(urls)
+
+    fetched = []
+    lock = threading.Lock()
+
+    def slow_extract(url, max_videos):
+        with lock:
+            fetched.append(url)
+        time.sleep(0.4)
+        return [{'ID': url.rsplit('/', 1)[-1]}]
+
+    nodes = [
+        threading.Thread(target=run_node, args=(queue, f'node-{n}', slow_extract),
+                         kwargs={'batch_size': 5, 'poll_interval': 0.1})
+        for n in range(3)
+    ]
+    for node in nodes:
+        node.start()
+    for node in nodes:
+        node.join()
+
+    assert sorted(fetched) == sorted(urls)
+    stats = queue.stats()
+    assert stats['done'] == 20 and stats['videos'] == 20
@@ -0,0 +1,262 @@
+"""Fila de trabalho compartilhada (SQLite) para extração distribuída em vários nós
+
+Cada nó pega um lote de URLs com lease; se o nó morrer, o lease expira e a URL
+volta para a fila. URLs já concluídas e IDs de vídeo já gravados não são
+processados de novo. O arquivo .db deve ficar num disco compartilhado com
+travamento de arquivos funcional (SQLite não é confiável sobre alguns NFS).
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+import streamlit_app
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    url TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    enqueued_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires);
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    node TEXT NOT NULL,
+    record TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def default_node_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """Fila com leases, timeout de visibilidade, limite de tentativas e dedup"""
+
+    def __init__(self, path, visibility_timeout=120, max_attempts=3, clock=time.time):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._clock = clock
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        # Uma conexão por operação: seguro entre threads e entre processos
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def enqueue(self, urls):
+        """Adiciona URLs; as já conhecidas (inclusive concluídas) são ignoradas"""
+        now = self._clock()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (url, enqueued_at) VALUES (?, ?)",
+                [(url, now) for url in urls],
+            )
+            return conn.total_changes - before
+
+    def lease(self, node, batch_size=5, visibility_timeout=None):
+        """Reserva até `batch_size` URLs para o nó e retorna a lista"""
+        now = self._clock()
+        expires = now + (visibility_timeout or self.visibility_timeout)
+        with self._transaction() as conn:
+            # Leases vencidos que já esgotaram as tentativas não voltam à fila
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', lease_owner = NULL, lease_expires = NULL, "
+                "last_error = COALESCE(last_error, 'lease expirado') "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            rows = conn.execute(
+                "SELECT url FROM tasks "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY enqueued_at LIMIT ?",
+                (now, batch_size),
+            ).fetchall()
+            urls = [row[0] for row in rows]
+            conn.executemany(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE url = ?",
+                [(node, expires, url) for url in urls],
+            )
+        return urls
+
+    def extend(self, url, node, visibility_timeout=None):
+        """Renova o lease de uma URL em andamento; False se o lease foi perdido"""
+        expires = self._clock() + (visibility_timeout or self.visibility_timeout)
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ? "
+                "WHERE url = ? AND status = 'leased' AND lease_owner = ?",
+                (expires, url, node),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, url, node, records):
+        """Grava os vídeos no destino compartilhado e conclui a URL.
+
+        Retorna quantos vídeos eram novos, ou None se o lease já pertence a
+        outro nó (o resultado é descartado para não duplicar).
+        """
+        now = self._clock()
+        with self._transaction() as conn:
+            owner = conn.execute(
+                "SELECT lease_owner FROM tasks WHERE url = ? AND status = 'leased'", (url,)
+            ).fetchone()
+            if not owner or owner[0] != node:
+                return None
+
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO videos (video_id, url, node, record, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(str(record['ID']), url, node, json.dumps(record, ensure_ascii=False), now)
+                 for record in records],
+            )
+            inserted = conn.total_changes - before
+            conn.execute(
+                "UPDATE tasks SET status = 'done', lease_owner = NULL, lease_expires = NULL, "
+                "last_error = NULL WHERE url = ?",
+                (url,),
+            )
+            return inserted
+
+    def fail(self, url, node, error):
+        """Devolve a URL à fila, ou marca como falha ao esgotar as tentativas"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET "
+                "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "lease_owner = NULL, lease_expires = NULL, last_error = ? "
+                "WHERE url = ? AND status = 'leased' AND lease_owner = ?",
+                (self.max_attempts, str(error)[:500], url, node),
+            )
+
+    def known_videos(self, video_ids):
+        """Subconjunto de `video_ids` que já está no destino compartilhado"""
+        video_ids = [str(v) for v in video_ids]
+        if not video_ids:
+            return set()
+        with self._transaction() as conn:
+            placeholders = ','.join('?' * len(video_ids))
+            rows = conn.execute(
+                f"SELECT video_id FROM videos WHERE video_id IN ({placeholders})", video_ids
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def stats(self):
+        with self._transaction() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+            counts['videos'] = conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+        for status in ('pending', 'leased', 'done', 'failed'):
+            counts.setdefault(status, 0)
+        return counts
+
+    def results(self):
+        """Todos os vídeos gravados, na ordem em que chegaram"""
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT record FROM videos ORDER BY created_at, video_id").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+def extract_url(url, max_videos=20):
+    """Extração padrão de um nó: erros de rede sobem para gerar nova tentativa"""
+    html = streamlit_app.fetch_page(url)
+    return streamlit_app.extract_from_html(html, max_videos)
+
+
+def run_node(queue, node=None, extract=extract_url, max_videos=20, batch_size=5,
+             poll_interval=2.0, exit_when_idle=True):
+    """Loop de um nó: pega lotes, extrai e grava até a fila esvaziar"""
+    node = node or default_node_id()
+    processed = 0
+
+    while True:
+        urls = queue.lease(node, batch_size)
+        if not urls:
+            stats = queue.stats()
+            if exit_when_idle and stats['pending'] == 0 and stats['leased'] == 0:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        for url in urls:
+            # O lote inteiro pode passar do timeout: renovar antes de cada URL e
+            # pular as que já foram reassumidas por outro nó
+            if not queue.extend(url, node):
+                continue
+            try:
+                records = extract(url, max_videos)
+            except Exception as e:
+                queue.fail(url, node, e)
+                continue
+
+            # Vídeos já gravados por outro nó não são reenviados
+            known = queue.known_videos(record['ID'] for record in records)
+            records = [record for record in records if str(record['ID']) not in known]
+            if queue.complete(url, node, records) is not None:
+                processed += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fila compartilhada de extração do Artlist")
+    parser.add_argument('db', help="Arquivo SQLite compartilhado entre os nós")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = sub.add_parser('enqueue', help="Adicionar URLs à fila")
+    enqueue.add_argument('urls', nargs='+')
+
+    work = sub.add_parser('work', help="Processar a fila neste nó")
+    work.add_argument('--node', default=None)
+    work.add_argument('--batch-size', type=int, default=5)
+    work.add_argument('--max-videos', type=int, default=20)
+    work.add_argument('--visibility-timeout', type=float, default=120)
+
+    sub.add_parser('stats', help="Mostrar contagens por status")
+    sub.add_parser('export', help="Exportar vídeos como JSON lines")
+
+    args = parser.parse_args(argv)
+    streamlit_app.use_headless_ui()
+    queue = WorkQueue(args.db, visibility_timeout=getattr(args, 'visibility_timeout', 120))
+
+    if args.command == 'enqueue':
+        print(f"{queue.enqueue(args.urls)} URLs novas na fila")
+    elif args.command == 'work':
+        processed = run_node(queue, node=args.node, max_videos=args.max_videos,
+                             batch_size=args.batch_size)
+        print(f"{processed} URLs processadas")
+    elif args.command == 'stats':
+        print(json.dumps(queue.stats()))
+    elif args.command == 'export':
+        for record in queue.results():
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+if __name__ == "__main__":
+    main()